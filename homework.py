@@ -1,6 +1,10 @@
+import json
 import logging
 import os
+import random
 import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from http import HTTPStatus
 from logging.handlers import RotatingFileHandler
 
@@ -8,6 +12,12 @@ from dotenv import load_dotenv
 import requests as r
 import telegram as t
 from json.decoder import JSONDecodeError
+from telegram.utils.request import Request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 load_dotenv()
@@ -18,8 +28,21 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 BEFORE_NOW_INTERVAL = 60 * 60 * 24
 RETRY_TIME = 600
+MIN_RETRY_TIME = 60
+RETRY_TIME_GROWTH = 1.5
+BASE_DELAY = 5
+MAX_DELAY = 3600
+TELEGRAM_MESSAGE_LIMIT = 4096
+STATE_PATH = os.getenv('STATE_PATH', '.hw_state.json')
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+REQUEST_TIMEOUT = (5, 30)
+
+SESSION = r.Session()
+SESSION.mount('https://', r.adapters.HTTPAdapter(pool_connections=1,
+                                                 pool_maxsize=2))
+
+_etag = None
 
 
 HOMEWORK_STATUSES = {
@@ -28,6 +51,19 @@ HOMEWORK_STATUSES = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+_STATUS_GET = HOMEWORK_STATUSES.get
+_TEMPLATE = 'Изменился статус проверки работы "{}". {}'.format
+
+
+class RateLimited(Exception):
+    """API отказал в запросе и прислал заголовок Retry-After."""
+
+    def __init__(self, retry_after):
+        """Сохраняет присланное API значение заголовка Retry-After."""
+        super().__init__(f'API просит повторить запрос через {retry_after} с.')
+        self.retry_after = retry_after
+
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 handler = RotatingFileHandler('homework_logger.log',
@@ -40,41 +76,83 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 
-def send_message(bot, message) -> None:
-    """Отправляет сообщение в Telegram-чат."""
+def send_message(bot, message) -> bool:
+    """Отправляет сообщение в Telegram-чат, возвращает успех отправки."""
     try:
         bot.send_message(TELEGRAM_CHAT_ID, message)
-        logger.info(f'Бот отправил в Telegram сообщение: {message}.')
     except Exception as send_error:
-        logger.error(f'Не удалось отправить сообщение: {send_error}.')
+        logger.error('Не удалось отправить сообщение: %s.', send_error)
+        return False
+    logger.info('Бот отправил в Telegram сообщение: %s.', message)
+    return True
 
 
 def get_api_answer(current_timestamp) -> dict:
     """Если запрос успешный, возвращает ответ API типа данных Python."""
+    global _etag
     params = {'from_date': current_timestamp}
+    headers = dict(HEADERS)
+    if _etag is not None:
+        headers['If-None-Match'] = _etag
     try:
-        response = r.get(ENDPOINT, headers=HEADERS, params=params)
+        response = SESSION.get(ENDPOINT, headers=headers, params=params,
+                               timeout=REQUEST_TIMEOUT)
     except ConnectionError:
         msg = 'Не удалось получить ответ от API'
         logger.error(msg)
         raise ConnectionError(msg)
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        return {'homeworks': [], 'current_date': current_timestamp}
     if response.status_code == HTTPStatus.OK:
+        _etag = response.headers.get('ETag')
         try:
+            if orjson is not None:
+                return orjson.loads(response.content)
             return response.json()
         except JSONDecodeError:
             msg = 'Не удалось преобразовать JSON-ответ к типу данных Python'
             logger.error(msg)
             raise JSONDecodeError(msg)
-    elif response.status_code == HTTPStatus.NOT_FOUND:
-        msg = (f'Произошел сбой: эндпоинт {ENDPOINT} недоступен. '
+    _raise_for_status(response)
+
+
+def _retry_after_seconds(response) -> int:
+    """Возвращает подсказку Retry-After в секундах, 0 — если её нет."""
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return 0
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    delta = retry_at - datetime.now(timezone.utc)
+    return max(0, int(delta.total_seconds()))
+
+
+def _raise_for_status(response) -> None:
+    """Бросает исключение, соответствующее неуспешному ответу API."""
+    retry_after = _retry_after_seconds(response)
+    if retry_after > 0:
+        msg = (f'Эндпоинт {ENDPOINT} просит повторить запрос '
+               f'через {retry_after} с. '
                f'Код ответа API: {response.status_code}')
         logger.error(msg)
-        raise r.RequestException(msg)
-    else:
-        msg = (f'Cбой при запросе к эндпоинту {ENDPOINT}. '
+        raise RateLimited(retry_after)
+    if response.status_code == HTTPStatus.NOT_FOUND:
+        msg = (f'Произошел сбой: эндпоинт {ENDPOINT} недоступен. '
                f'Код ответа API: {response.status_code}')
         logger.error(msg)
         raise r.RequestException(msg)
+    msg = (f'Cбой при запросе к эндпоинту {ENDPOINT}. '
+           f'Код ответа API: {response.status_code}')
+    logger.error(msg)
+    raise r.RequestException(msg)
 
 
 def check_response(response) -> list:
@@ -94,35 +172,85 @@ def check_response(response) -> list:
 
 def parse_status(homework) -> str:
     """Возвращает один из вердиктов словаря HOMEWORK_STATUSES."""
-    try:
-        homework_name = homework.get('homework_name')
-    except AttributeError:
+    if not isinstance(homework, dict):
         msg = f'Тип данных домашки {type(homework)}, а не dict.'
         logger.error(msg)
-        raise AttributeError(msg)
-    if homework_name is None:
+        raise TypeError(msg)
+    if 'homework_name' not in homework:
         msg = 'В словаре homework нет ключа homework_name.'
         logger.error(msg)
         raise KeyError(msg)
-    verdict = HOMEWORK_STATUSES.get(homework.get('status'))
+    homework_name = homework['homework_name']
+    verdict = _STATUS_GET(homework.get('status'))
     if verdict is None:
         msg = ('Недокументированный статус домашней работы.')
         logger.error(msg)
         raise KeyError(msg)
-    return (f'Изменился статус проверки работы "{homework_name}". {verdict}')
+    return _TEMPLATE(homework_name, verdict)
+
+
+def _notify_changes(bot, homework_list, last_status) -> list:
+    """Шлёт уведомления об изменившихся статусах, возвращает изменения."""
+    chunks = []
+    for homework in homework_list:
+        homework_name = homework.get('homework_name')
+        status = homework.get('status')
+        if last_status.get(homework_name) == status:
+            continue
+        part = parse_status(homework)
+        if (chunks and len(chunks[-1][0]) + len(part) + 2
+                <= TELEGRAM_MESSAGE_LIMIT):
+            chunks[-1][0] += '\n\n' + part
+            chunks[-1][1].append((homework_name, status))
+        else:
+            chunks.append([part, [(homework_name, status)]])
+    changed = []
+    for message, entries in chunks:
+        if not send_message(bot, message):
+            continue
+        for homework_name, status in entries:
+            last_status[homework_name] = status
+        changed.extend(entries)
+    return changed
+
+
+def load_state() -> dict:
+    """Возвращает сохранённое состояние бота или пустой словарь."""
+    try:
+        with open(STATE_PATH, encoding='utf-8') as state_file:
+            state = json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(state, dict):
+        return {}
+    if not isinstance(state.get('statuses'), dict):
+        state['statuses'] = {}
+    if not isinstance(state.get('timestamp'), int):
+        state.pop('timestamp', None)
+    return state
+
+
+def save_state(state) -> None:
+    """Атомарно сохраняет состояние бота в файле STATE_PATH."""
+    tmp_path = STATE_PATH + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as state_file:
+            json.dump(state, state_file, ensure_ascii=False)
+        os.replace(tmp_path, STATE_PATH)
+    except OSError as save_error:
+        logger.error('Не удалось сохранить состояние: %s.', save_error)
 
 
 def check_tokens() -> bool:
     """Проверка доступности обязательных переменных окружения."""
-    tokens = ['PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID']
-    missing_tokens = []
-    for token in tokens:
-        if globals()[token] is None:
-            missing_tokens.append(token)
-    if len(missing_tokens) != 0:
-        logger.critical('Нет обязательных переменных окружения: '
-                        f'{", ".join(missing_tokens)}. '
-                        'Программа принудительно остановлена.')
+    tokens = (('PRACTICUM_TOKEN', PRACTICUM_TOKEN),
+              ('TELEGRAM_TOKEN', TELEGRAM_TOKEN),
+              ('TELEGRAM_CHAT_ID', TELEGRAM_CHAT_ID))
+    missing_tokens = [name for name, value in tokens if value is None]
+    if missing_tokens:
+        logger.critical('Нет обязательных переменных окружения: %s. '
+                        'Программа принудительно остановлена.',
+                        ', '.join(missing_tokens))
 
         return False
     return True
@@ -132,28 +260,51 @@ def main() -> None:
     """Основная логика работы бота."""
     if not check_tokens():
         raise t.error.InvalidToken()
-    bot = t.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time()) - BEFORE_NOW_INTERVAL
+    bot = t.Bot(token=TELEGRAM_TOKEN,
+                request=Request(con_pool_size=8,
+                                connect_timeout=5,
+                                read_timeout=10))
+    state = load_state()
+    current_timestamp = state.get('timestamp',
+                                  int(time.time()) - BEFORE_NOW_INTERVAL)
+    last_status = state.get('statuses', {})
     msg_error = ''
+    attempt = 0
+    interval = RETRY_TIME
     while True:
         try:
             response = get_api_answer(current_timestamp)
             homework_list = check_response(response)
+            changed = []
             if len(homework_list) == 0:
                 logger.debug('Статус проверки не обновлялся.')
             else:
-                for homework in homework_list:
-                    message = parse_status(homework)
-                    send_message(bot, message)
-            current_timestamp = response.get('current_date', current_timestamp)
+                changed = _notify_changes(bot, homework_list, last_status)
+            new_timestamp = response.get('current_date', current_timestamp)
+            if changed or new_timestamp != current_timestamp:
+                current_timestamp = new_timestamp
+                save_state({'statuses': last_status,
+                            'timestamp': current_timestamp})
+            if changed:
+                interval = MIN_RETRY_TIME
+            else:
+                interval = min(interval * RETRY_TIME_GROWTH, RETRY_TIME)
             msg_error = ''
+            attempt = 0
         except Exception as error:
-            if error != msg_error:
+            if str(error) != msg_error:
                 message = f'Произошел сбой: {error}'
-                msg_error = error
+                msg_error = str(error)
                 logger.error(message)
                 send_message(bot, message)
-        time.sleep(RETRY_TIME)
+            delay = random.uniform(0, min(MAX_DELAY,
+                                          BASE_DELAY * 2 ** attempt))
+            if isinstance(error, RateLimited):
+                delay = max(error.retry_after, delay)
+            attempt += 1
+            time.sleep(delay)
+            continue
+        time.sleep(interval)
 
 
 if __name__ == '__main__':
@@ -1,3 +1,4 @@
+import json
 import os
 from http import HTTPStatus
 
@@ -44,6 +45,7 @@ class MockResponseGET:
         )
         self.random_timestamp = random_timestamp
         self.status_code = http_status
+        self.headers = {}
 
     def json(self):
         data = {
@@ -52,6 +54,10 @@ class MockResponseGET:
         }
         return data
 
+    @property
+    def content(self):
+        return json.dumps(self.json()).encode()
+
 
 class MockTelegramBot:
 
@@ -186,10 +192,10 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'get_api_answer'
         utils.check_function(homework, func_name, 1)
 
@@ -232,10 +238,10 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_500_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_500_response_get)
+
         func_name = 'get_api_answer'
         try:
             homework.get_api_answer(current_timestamp)
@@ -315,10 +321,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         response = homework.get_api_answer(current_timestamp)
         status = homework.check_response(response)
@@ -352,10 +358,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'parse_status'
         response = homework.get_api_answer(current_timestamp)
         homeworks = homework.check_response(response)
@@ -400,10 +406,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'parse_status'
         response = homework.get_api_answer(current_timestamp)
         homeworks = homework.check_response(response)
@@ -448,10 +454,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'parse_status'
         response = homework.get_api_answer(current_timestamp)
         homeworks = homework.check_response(response)
@@ -484,10 +490,10 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_no_homeworks_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_no_homeworks_response_get)
+
         func_name = 'check_response'
         result = homework.get_api_answer(current_timestamp)
         try:
@@ -525,10 +531,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         response = homework.get_api_answer(current_timestamp)
         try:
@@ -565,10 +571,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         response = homework.get_api_answer(current_timestamp)
         try:
@@ -599,10 +605,10 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_empty_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_empty_response_get)
+
         func_name = 'check_response'
         result = homework.get_api_answer(current_timestamp)
         try:
@@ -626,10 +632,10 @@ class TestHomework:
             )
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         try:
             homework.get_api_answer(current_timestamp)
@@ -640,3 +646,143 @@ class TestHomework:
                 f'Убедитесь, что в функции `{func_name}` обрабатываете ситуацию, '
                 'когда API возвращает код, отличный от 200'
             )
+
+    def test_state_roundtrip(self, tmp_path, monkeypatch):
+        import homework
+
+        state_path = tmp_path / 'state.json'
+        monkeypatch.setattr(homework, 'STATE_PATH', str(state_path))
+
+        assert homework.load_state() == {}, (
+            'Проверьте, что `load_state` возвращает пустой словарь, '
+            'когда файла состояния ещё нет'
+        )
+
+        state = {'statuses': {'hw123': 'approved'}, 'timestamp': 123}
+        homework.save_state(state)
+        assert homework.load_state() == state, (
+            'Проверьте, что `load_state` возвращает то, '
+            'что сохранил `save_state`'
+        )
+
+        state_path.write_text('{broken json', encoding='utf-8')
+        assert homework.load_state() == {}, (
+            'Проверьте, что `load_state` возвращает пустой словарь '
+            'при повреждённом файле состояния'
+        )
+
+        state_path.write_text('[1, 2, 3]', encoding='utf-8')
+        assert homework.load_state() == {}, (
+            'Проверьте, что `load_state` возвращает пустой словарь, '
+            'когда в файле состояния сохранён не словарь'
+        )
+
+        state_path.write_text('{"statuses": [1], "timestamp": "123"}',
+                              encoding='utf-8')
+        loaded = homework.load_state()
+        assert loaded.get('statuses') == {}, (
+            'Проверьте, что `load_state` сбрасывает `statuses` '
+            'в пустой словарь, если сохранён не словарь'
+        )
+        assert 'timestamp' not in loaded, (
+            'Проверьте, что `load_state` отбрасывает `timestamp`, '
+            'если сохранено не целое число'
+        )
+
+    def test_notify_changes(self):
+        import homework
+
+        sent = []
+
+        class RecordingBot:
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                sent.append(text)
+
+        last_status = {'hw1': 'approved'}
+        homework_list = [
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2', 'status': 'rejected'},
+            {'homework_name': 'hw3', 'status': 'reviewing'},
+        ]
+        changed = homework._notify_changes(
+            RecordingBot(), homework_list, last_status
+        )
+        assert len(sent) == 1, (
+            'Проверьте, что несколько изменившихся статусов '
+            'отправляются одним сообщением'
+        )
+        assert 'hw1' not in sent[0], (
+            'Проверьте, что неизменившийся статус '
+            'не попадает в уведомление'
+        )
+        assert 'hw2' in sent[0] and 'hw3' in sent[0], (
+            'Проверьте, что все изменившиеся статусы '
+            'попадают в уведомление'
+        )
+        assert changed == [('hw2', 'rejected'), ('hw3', 'reviewing')], (
+            'Проверьте, что `_notify_changes` возвращает '
+            'список изменившихся статусов'
+        )
+        assert last_status == {
+            'hw1': 'approved', 'hw2': 'rejected', 'hw3': 'reviewing'
+        }, (
+            'Проверьте, что `_notify_changes` запоминает '
+            'отправленные статусы'
+        )
+
+    def test_notify_changes_failed_send(self):
+        import homework
+
+        class FailingBot:
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                raise telegram.TelegramError('сбой отправки')
+
+        last_status = {}
+        homework_list = [{'homework_name': 'hw1', 'status': 'approved'}]
+        changed = homework._notify_changes(
+            FailingBot(), homework_list, last_status
+        )
+        assert changed == [] and last_status == {}, (
+            'Проверьте, что при неудачной отправке сообщения '
+            'статус не запоминается и будет отправлен повторно'
+        )
+
+    def test_retry_after_seconds(self):
+        import homework
+
+        class StubResponse:
+
+            def __init__(self, headers):
+                self.headers = headers
+
+        assert homework._retry_after_seconds(StubResponse({})) == 0, (
+            'Проверьте, что без заголовка Retry-After '
+            '`_retry_after_seconds` возвращает 0'
+        )
+        assert homework._retry_after_seconds(
+            StubResponse({'Retry-After': '120'})
+        ) == 120, (
+            'Проверьте, что целочисленный Retry-After '
+            'возвращается как есть'
+        )
+        future = StubResponse(
+            {'Retry-After': 'Wed, 21 Oct 2048 07:28:00 GMT'}
+        )
+        assert homework._retry_after_seconds(future) > 0, (
+            'Проверьте, что Retry-After в формате HTTP-даты '
+            'переводится в положительное число секунд'
+        )
+        past = StubResponse(
+            {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        )
+        assert homework._retry_after_seconds(past) == 0, (
+            'Проверьте, что дата в прошлом не даёт '
+            'отрицательную задержку'
+        )
+        garbage = StubResponse({'Retry-After': 'через пять минут'})
+        assert homework._retry_after_seconds(garbage) == 0, (
+            'Проверьте, что нечитаемый Retry-After '
+            'трактуется как отсутствующий'
+        )